@@ -0,0 +1,18 @@
+import os
+
+# Gunicorn settings for serving the API with Uvicorn workers:
+#   gunicorn -c gunicorn_conf.py main:app
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+# Expose the worker count to the app, which splits the CPU cores for password hashing across workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+backlog = 2048
+timeout = 30
+keepalive = 10
+graceful_timeout = 30
+
+# Import the app once in the master process; every worker still creates its own
+# Supabase client and connection pool in the lifespan handler after forking
+preload_app = True
@@ -1,13 +1,28 @@
 from fastapi import FastAPI, HTTPException, Depends, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, timedelta, date
-from jose import JWTError, jwt
+import jwt
 import bcrypt
-from typing import Optional, List
-from supabase import create_client, Client
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from typing import Optional, List, Annotated
+from cachetools import TTLCache
+from contextlib import asynccontextmanager
+from supabase import AsyncClient, acreate_client
+from supabase.lib.client_options import AsyncClientOptions
+from postgrest import APIError
+import httpx
+import orjson
 from dotenv import load_dotenv
 import os
+import hashlib
+import hmac
+import secrets
+import time
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,57 +35,134 @@ key = os.environ.get("SUPABASE_KEY")
 SECRET_KEY = os.environ.get("JWT_SECRET", "change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Only the claims we issue are checked; audience and issuer are not used
+JWT_DECODE_OPTIONS = {"require": ["exp", "user_id"], "verify_aud": False, "verify_iss": False}
+
+# Number of food rows fetched per page when streaming an inventory
+FOOD_PAGE_SIZE = 500
+
+# Columns returned by the food list endpoints
+FOOD_LIST_COLUMNS = "id,name,quantity,unit,expiration_date"
+
+# Argon2id parameters for new password hashes (defaults are the OWASP minimum recommendation)
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", str(19 * 1024)))
+password_hasher = PasswordHasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=1)
+
+# Password hashing threads per worker process. By default the CPU cores are split across
+# the WEB_CONCURRENCY server workers, so concurrent hashes across all workers stay near the core count
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+KDF_THREADS = int(os.environ.get("KDF_THREADS", str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))))
+
+# Hash of a random password, verified against when a login names an unknown user
+DUMMY_PASSWORD_HASH = password_hasher.hash(secrets.token_urlsafe(32))
+
+# Results of recent password checks, keyed by an HMAC with a per-process secret
+VERIFY_CACHE_PEPPER = secrets.token_bytes(32)
+verify_cache: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+# Recently decoded access tokens, keyed by their SHA-256 digest and mapped to (user_id, exp)
+token_cache: TTLCache = TTLCache(maxsize=4096, ttl=30)
+
+# Login records (id, password_hash) by username, refreshed every few seconds.
+# Unknown usernames are cached as UNKNOWN_USER so they cost the same I/O as known ones.
+user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+UNKNOWN_USER = object()
+
+# Connection pool shared by the PostgREST and Auth clients (both receive the same httpx client)
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=50, keepalive_expiry=30)
+HTTP_TIMEOUT = httpx.Timeout(5.0)
 
 # Ensure required environment variables are set
 if not url or not key:
     raise RuntimeError("Please set SUPABASE_URL and SUPABASE_KEY in your environment or .env file")
 
-# Initialize Supabase client
-supabase: Client = create_client(url, key)
+# Async Supabase client, created on startup by the lifespan handler
+supabase: Optional[AsyncClient] = None
+
+# Thread pool reserved for password hashing, sized by KDF_THREADS
+kdf_pool: Optional[ThreadPoolExecutor] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the async Supabase client when the app starts, backed by one pooled HTTP client
+    so that keep-alive connections are reused across requests.
+    Also starts the thread pool used for password hashing.
+    """
+    global supabase, kdf_pool
+    # The transport retries only failures while opening a new connection (ConnectError/ConnectTimeout);
+    # a request that fails on a reused keep-alive socket is not retried, so no query is ever sent twice
+    transport = httpx.AsyncHTTPTransport(retries=1, http2=True, limits=HTTP_POOL_LIMITS)
+    http_client = httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT)
+    supabase = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http_client))
+    kdf_pool = ThreadPoolExecutor(max_workers=KDF_THREADS, thread_name_prefix="kdf")
+    yield
+    kdf_pool.shutdown(wait=False)
+    await http_client.aclose()
 
 # Set up FastAPI app
-app = FastAPI(title="WasteLess API")
+app = FastAPI(title="WasteLess API", lifespan=lifespan)
 bearer_scheme = HTTPBearer()
 
 # ----------- SECURITY SETUP -----------
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Security(bearer_scheme)
 ) -> int:
     """
     Extracts the current user's ID from the provided JWT token.
+    Decoded tokens are cached briefly so repeated requests skip the signature check.
     """
     token = credentials.credentials
+    cache_key = hashlib.sha256(token.encode('utf-8')).digest()
+    cached = token_cache.get(cache_key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options=JWT_DECODE_OPTIONS)
+        user_id: int = payload["user_id"]
+        token_cache[cache_key] = (user_id, payload["exp"])
         return user_id
-    except JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 # ----------- MODELS -----------
 
+# Quantities must be positive
+Quantity = Annotated[float, Field(gt=0)]
+
+# Passwords are taken verbatim, so user models don't strip whitespace
 class UserCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     username: str
     email: str
     password: str
 
 class UserLogin(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
     username: str
     password: str
 
 class FoodItemCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True, frozen=True)
+
     name: str
-    quantity: float
+    quantity: Quantity
     unit: str
     expiration_date: date
 
 class FoodItemConsume(BaseModel):
-    quantity: float
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    quantity: Quantity
 
 class RecipeCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True, frozen=True)
+
     title: str
     description: Optional[str] = None
     ingredients: List[FoodItemCreate]
@@ -79,16 +171,55 @@ class RecipeCreate(BaseModel):
 
 def hash_password(plain_password: str) -> str:
     """
-    Hashes a plain-text password using bcrypt.
+    Hashes a plain-text password using Argon2id.
     """
-    return bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies that a plain-text password matches a hashed password.
+    Accepts Argon2id hashes as well as legacy bcrypt hashes.
     """
+    if hashed_password.startswith("$argon2"):
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks whether a stored hash is a legacy bcrypt hash or uses outdated Argon2id parameters.
+    """
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+async def run_kdf(func, *args):
+    """
+    Runs a password hashing function on the dedicated KDF thread pool.
+    """
+    return await asyncio.get_running_loop().run_in_executor(kdf_pool, func, *args)
+
+def credential_cache_key(username: str, plain_password: str, hashed_password: str) -> bytes:
+    """
+    Derives the verification cache key for a login attempt without keeping the password in memory.
+    """
+    password_digest = hashlib.sha256(plain_password.encode('utf-8')).digest()
+    message = b"\0".join([username.encode('utf-8'), hashed_password.encode('utf-8'), password_digest])
+    return hmac.new(VERIFY_CACHE_PEPPER, message, hashlib.sha256).digest()
+
+async def verify_password_cached(username: str, plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password, reusing the result of an identical check made within the last minute.
+    """
+    cache_key = credential_cache_key(username, plain_password, hashed_password)
+    result = verify_cache.get(cache_key)
+    if result is None:
+        result = await run_kdf(verify_password, plain_password, hashed_password)
+        verify_cache[cache_key] = result
+    return result
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Generates an access token with an optional expiration time.
@@ -106,156 +237,167 @@ def normalize_name(s: str) -> str:
 
 # ----------- DATABASE HELPERS -----------
 
-def create_user_in_db(user: UserCreate):
+async def create_user_in_db(user: UserCreate):
     """
     Creates a new user in the database.
     """
-    password_hash = hash_password(user.password)
-    response = supabase.table("users").insert({
+    # Hash on the KDF thread pool so the event loop keeps serving other requests
+    password_hash = await run_kdf(hash_password, user.password)
+    response = await supabase.table("users").insert({
         "username": user.username,
         "email": user.email,
         "password_hash": password_hash
     }).execute()
+    if response.data:
+        user_cache[user.username] = {"id": response.data[0]["id"], "password_hash": password_hash}
     return response
 
-def get_user_by_username(username: str):
+async def get_user_by_username(username: str):
     """
-    Retrieves a user from the database by their username.
+    Retrieves the id and password hash of a user by their username.
+    Results, including misses, are served from a short-lived cache.
     """
-    response = supabase.table("users").select("*").eq("username", username).limit(1).execute()
-    return response.data[0] if response.data else None
+    user_record = user_cache.get(username)
+    if user_record is None:
+        response = await supabase.table("users").select("id,password_hash").eq("username", username).limit(1).maybe_single().execute()
+        user_record = (response.data if response else None) or UNKNOWN_USER
+        user_cache[username] = user_record
+    return None if user_record is UNKNOWN_USER else user_record
 
-def find_existing_food_row(user_id: int, name: str, unit: str, expiration_date: date):
+async def update_password_hash(user_id: int, password_hash: str):
     """
-    Checks if a food item already exists in the user's food inventory.
+    Replaces the stored password hash of a user.
     """
-    response = supabase.table("food_stock").select("*").eq("user_id", user_id).eq("name_norm", normalize_name(name)).eq("unit", unit).eq("expiration_date", str(expiration_date)).limit(1).execute()
-    return response.data[0] if response.data else None
+    return await supabase.table("users").update({"password_hash": password_hash}, returning="minimal").eq("id", user_id).execute()
 
-def add_or_update_food_item(user_id: int, item: FoodItemCreate):
+async def add_or_update_food_item(user_id: int, item: FoodItemCreate):
     """
     Adds a new food item to the user's inventory or updates the quantity if the item already exists.
+    Both cases run as a single upsert in the upsert_food_item database function.
+    """
+    resp = await supabase.rpc("upsert_food_item", {
+        "uid": user_id,
+        "item_name": item.name,
+        "item_name_norm": normalize_name(item.name),
+        "item_quantity": item.quantity,
+        "item_unit": item.unit,
+        "item_expiration_date": str(item.expiration_date)
+    }).execute()
+    if not resp.data:
+        return None, None
+    row = resp.data[0]
+    return [row["item"]], "created" if row["created"] else "updated"
+
+async def fetch_food_page(user_id: int, after_id: int):
     """
-    existing = find_existing_food_row(user_id, item.name, item.unit, item.expiration_date)
-    if existing:
-        new_qty = float(existing["quantity"]) + float(item.quantity)
-        resp = supabase.table("food_stock").update({"quantity": new_qty}).eq("id", existing["id"]).eq("user_id", user_id).execute()
-        return resp, "updated"
-    else:
-        resp = supabase.table("food_stock").insert({
-            "user_id": user_id,
-            "name": item.name,
-            "name_norm": normalize_name(item.name),
-            "quantity": item.quantity,
-            "unit": item.unit,
-            "expiration_date": str(item.expiration_date)
-        }).execute()
-        return resp, "created"
+    Retrieves the next page of food items in the user's inventory, ordered by id and starting after `after_id`.
+    """
+    response = await (supabase.table("food_stock").select(FOOD_LIST_COLUMNS).eq("user_id", user_id)
+                      .gt("id", after_id).order("id").limit(FOOD_PAGE_SIZE).execute())
+    return response.data or []
 
-def get_all_food_items(user_id: int):
+async def stream_food_items(user_id: int, first_page: list):
     """
-    Retrieves all food items in the user's inventory.
+    Yields all food items in the user's inventory as a JSON document, one page of rows at a time.
     """
-    return supabase.table("food_stock").select("*").eq("user_id", user_id).execute()
+    yield b'{"items":['
+    rows = first_page
+    separator = b""
+    while rows:
+        yield separator + b",".join(orjson.dumps(row) for row in rows)
+        separator = b","
+        if len(rows) < FOOD_PAGE_SIZE:
+            break
+        rows = await fetch_food_page(user_id, rows[-1]["id"])
+    yield b"]}"
 
-def get_food_item_detail(user_id: int, item_id: int):
+async def get_food_item_detail(user_id: int, item_id: int):
     """
     Retrieves details of a specific food item from the user's inventory.
     """
-    response = supabase.table("food_stock").select("*").eq("user_id", user_id).eq("id", item_id).limit(1).execute()
+    response = await supabase.table("food_stock").select("*").eq("user_id", user_id).eq("id", item_id).limit(1).execute()
     return response.data[0] if response.data else None
 
-def delete_user_food_from_db(user_id: int):
+async def delete_user_food_from_db(user_id: int):
     """
     Deletes all food items from the user's inventory.
     """
-    response = supabase.table("food_stock").delete().eq("user_id", user_id).execute()
+    response = await supabase.table("food_stock").delete(returning="minimal").eq("user_id", user_id).execute()
     return response
 
 
-def compute_recipe_suggestions(user_id: int):
+async def compute_recipe_suggestions(user_id: int):
     """
     Suggests recipes based on the user's available food items.
+    The matching runs in the database through the suggest_recipes function.
     """
-    # Step 1: Retrieve all food items in the user's inventory
-    food_items_response = get_all_food_items(user_id)
-    user_food_items = {item["name_norm"]: item for item in food_items_response.data or []}
-
-    # Step 2: Retrieve all recipes from the database
-    recipes_response = supabase.table("recipes").select("*").eq("user_id", user_id).execute()
-    if not recipes_response.data:
-        return {"suggestions": []}  # No recipes found for the user
-
-    recipes = recipes_response.data
+    response = await supabase.rpc("suggest_recipes", {"uid": user_id}).execute()
     suggested_recipes = []
 
-    # Step 3: Iterate through each recipe and check if it can be made with the user's food items
-    for recipe in recipes:
-        recipe_id = recipe["id"]
-        ingredients_response = supabase.table("recipe_ingredients").select("*").eq("recipe_id", recipe_id).execute()
-
-        if not ingredients_response.data:
-            continue  # Skip recipes that don't have ingredients
-
-        recipe_ingredients = ingredients_response.data
-        missing_ingredients = []
-        can_make_recipe = True
-
-        # Check if the user has the necessary ingredients
-        for ingredient in recipe_ingredients:
-            ingredient_name = ingredient["name_norm"]
-            if ingredient_name not in user_food_items:
-                missing_ingredients.append(ingredient["name"])
-                can_make_recipe = False
-
+    for recipe in response.data or []:
         # If the recipe can be made (all ingredients are available)
-        if can_make_recipe:
+        if not recipe["missing"]:
             suggested_recipes.append({
                 "title": recipe["title"],
                 "description": recipe["description"],
-                "ingredients": [ingredient["name"] for ingredient in recipe_ingredients]
+                "ingredients": recipe["ingredients"]
             })
-        elif missing_ingredients:
+        else:
             suggested_recipes.append({
                 "title": recipe["title"],
                 "description": recipe["description"],
-                "missing_ingredients": missing_ingredients
+                "missing_ingredients": recipe["missing"]
             })
 
-    # Step 4: Return the list of suggested recipes
     return {"suggestions": suggested_recipes}
 
 # ----------- ROUTES -----------
 
 @app.post("/users/", tags=["auth"])
-def create_user(user: UserCreate):
+async def create_user(user: UserCreate):
     """
     Endpoint to create a new user.
     """
-    # Check if the username already exists
-    if get_user_by_username(user.username):
-        raise HTTPException(status_code=409, detail="Username already exists")
-    response = create_user_in_db(user)
+    # Insert directly and let the UNIQUE constraints reject duplicate usernames and emails
+    try:
+        response = await create_user_in_db(user)
+    except APIError as e:
+        if e.code == "23505":
+            if (e.details or "").startswith("Key (email)="):
+                raise HTTPException(status_code=409, detail="Email already exists")
+            raise HTTPException(status_code=409, detail="Username already exists")
+        raise
     if response.data:
         return {"message": "User created", "data": response.data}
     else:
         raise HTTPException(status_code=500, detail="Error creating user")
 
 @app.post("/login/", tags=["auth"])
-def login_user(user: UserLogin):
+async def login_user(user: UserLogin):
     """
     Endpoint for user login, returns an access token.
     """
     # Verify username and password
-    user_record = get_user_by_username(user.username)
-    if not user_record or not verify_password(user.password, user_record["password_hash"]):
+    user_record = await get_user_by_username(user.username)
+    if not user_record:
+        # Verify against a dummy hash so unknown usernames take as long as wrong passwords
+        await verify_password_cached(user.username, user.password, DUMMY_PASSWORD_HASH)
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+    if not await verify_password_cached(user.username, user.password, user_record["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    # Migrate legacy bcrypt hashes to Argon2id now that the plain password is known
+    if password_needs_rehash(user_record["password_hash"]):
+        new_hash = await run_kdf(hash_password, user.password)
+        await update_password_hash(user_record["id"], new_hash)
+        user_cache.pop(user.username, None)
+
     access_token = create_access_token(data={"user_id": user_record["id"]})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @app.post("/users/{user_id}/food", tags=["food"])
-def add_food_item(user_id: int, item: FoodItemCreate, current_user_id: int = Depends(get_current_user)):
+async def add_food_item(user_id: int, item: FoodItemCreate, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to add a food item to the user's inventory or update its quantity if it already exists.
     """
@@ -264,17 +406,17 @@ def add_food_item(user_id: int, item: FoodItemCreate, current_user_id: int = Dep
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Add or update the food item in the inventory
-    resp, status = add_or_update_food_item(user_id, item)
+    data, status = await add_or_update_food_item(user_id, item)
 
-    if resp.data is None:
+    if data is None:
         raise HTTPException(status_code=400, detail="Error adding/updating item")
 
     # Return success message with the response data
-    return {"message": f"Item {status}", "data": resp.data}
+    return {"message": f"Item {status}", "data": data}
 
 
 @app.get("/users/{user_id}/food", tags=["food"])
-def list_food_items(user_id: int, current_user_id: int = Depends(get_current_user)):
+async def list_food_items(user_id: int, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to list all food items in the user's inventory.
     """
@@ -282,15 +424,15 @@ def list_food_items(user_id: int, current_user_id: int = Depends(get_current_use
     if current_user_id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    # Retrieve all food items from the user's inventory
-    response = get_all_food_items(user_id)
+    # Fetch the first page before responding so database errors still produce an error status
+    first_page = await fetch_food_page(user_id, 0)
 
-    # Return the list of food items or an empty list if none exist
-    return {"items": response.data or []}
+    # Stream the food items page by page instead of building the whole list in memory
+    return StreamingResponse(stream_food_items(user_id, first_page), media_type="application/json")
 
 
 @app.get("/users/{user_id}/food/{item_id}", tags=["food"])
-def food_item_detail(user_id: int, item_id: int, current_user_id: int = Depends(get_current_user)):
+async def food_item_detail(user_id: int, item_id: int, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to get the details of a specific food item in the user's inventory.
     """
@@ -299,7 +441,7 @@ def food_item_detail(user_id: int, item_id: int, current_user_id: int = Depends(
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Retrieve the food item details by ID
-    item = get_food_item_detail(user_id, item_id)
+    item = await get_food_item_detail(user_id, item_id)
 
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -309,7 +451,7 @@ def food_item_detail(user_id: int, item_id: int, current_user_id: int = Depends(
 
 
 @app.post("/users/{user_id}/food/{item_id}/consume", tags=["food"])
-def consume_item(user_id: int, item_id: int, body: FoodItemConsume, current_user_id: int = Depends(get_current_user)):
+async def consume_item(user_id: int, item_id: int, body: FoodItemConsume, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to reduce the quantity of a food item in the user's inventory.
     If the quantity reaches zero or below, the item will be deleted.
@@ -318,28 +460,20 @@ def consume_item(user_id: int, item_id: int, body: FoodItemConsume, current_user
     if current_user_id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    # Retrieve the food item by ID
-    item = get_food_item_detail(user_id, item_id)
+    # Subtract the quantity and delete the item if nothing is left, in one database call
+    resp = await supabase.rpc("consume_food", {"uid": user_id, "iid": item_id, "qty": body.quantity}).execute()
 
-    if not item:
+    if not resp.data:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    # Calculate the new quantity after consumption
-    new_qty = float(item["quantity"]) - float(body.quantity)
-
-    if new_qty <= 0:
-        # If the item quantity is zero or negative, delete the item
-        supabase.table("food_stock").delete().eq("id", item_id).eq("user_id", user_id).execute()
+    if resp.data[0]["quantity"] <= 0:
         return {"message": "Item consumed and removed"}
     else:
-        # Otherwise, update the quantity of the item
-        resp = supabase.table("food_stock").update({"quantity": new_qty}).eq("id", item_id).eq("user_id",
-                                                                                               user_id).execute()
         return {"message": "Item quantity updated", "data": resp.data}
 
 
 @app.delete("/users/{user_id}/food/{item_id}", tags=["food"])
-def delete_item(user_id: int, item_id: int, current_user_id: int = Depends(get_current_user)):
+async def delete_item(user_id: int, item_id: int, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to delete a food item from the user's inventory.
     """
@@ -348,14 +482,14 @@ def delete_item(user_id: int, item_id: int, current_user_id: int = Depends(get_c
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Delete the food item by ID
-    supabase.table("food_stock").delete().eq("id", item_id).eq("user_id", user_id).execute()
+    await supabase.table("food_stock").delete(returning="minimal").eq("id", item_id).eq("user_id", user_id).execute()
 
     # Return a confirmation message
     return {"message": "Item deleted"}
 
 
 @app.delete("/users/{user_id}/food", tags=["food"])
-def delete_user_food(user_id: int, current_user_id: int = Depends(get_current_user)):
+async def delete_user_food(user_id: int, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to delete all food items from the user's inventory.
     """
@@ -364,14 +498,14 @@ def delete_user_food(user_id: int, current_user_id: int = Depends(get_current_us
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Delete all food items from the user's inventory
-    response = delete_user_food_from_db(user_id)
+    response = await delete_user_food_from_db(user_id)
 
     # Return a confirmation message
     return {"message": f"All food items for user {user_id} deleted."}
 
 
 @app.get("/users/{user_id}/food/expiring", tags=["food"])
-def expiring_items(user_id: int, days: int = 5, current_user_id: int = Depends(get_current_user)):
+async def expiring_items(user_id: int, days: int = 5, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to list food items that are expiring within a specified number of days (default is 5 days).
     """
@@ -384,20 +518,20 @@ def expiring_items(user_id: int, days: int = 5, current_user_id: int = Depends(g
     until = today + timedelta(days=days)
 
     # Retrieve food items expiring within the specified date range
-    resp = (supabase.table("food_stock")
-            .select("*")
-            .eq("user_id", user_id)
-            .gte("expiration_date", str(today))
-            .lte("expiration_date", str(until))
-            .order("expiration_date", desc=False)
-            .execute())
+    resp = await (supabase.table("food_stock")
+                  .select(FOOD_LIST_COLUMNS)
+                  .eq("user_id", user_id)
+                  .gte("expiration_date", str(today))
+                  .lte("expiration_date", str(until))
+                  .order("expiration_date", desc=False)
+                  .execute())
 
     # Return the list of expiring items or an empty list if none exist
     return {"items": resp.data or []}
 
 
 @app.get("/users/{user_id}/recipes/suggest", tags=["recipes"])
-def suggest_recipes(user_id: int, current_user_id: int = Depends(get_current_user)):
+async def suggest_recipes(user_id: int, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to suggest recipes based on the user's food inventory.
     """
@@ -406,11 +540,11 @@ def suggest_recipes(user_id: int, current_user_id: int = Depends(get_current_use
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Call the function to compute recipe suggestions based on the user's food inventory
-    return {"suggestions": compute_recipe_suggestions(user_id)}
+    return {"suggestions": await compute_recipe_suggestions(user_id)}
 
 
 @app.post("/users/{user_id}/recipes", tags=["recipes"])
-def save_recipe(user_id: int, payload: RecipeCreate, current_user_id: int = Depends(get_current_user)):
+async def save_recipe(user_id: int, payload: RecipeCreate, current_user_id: int = Depends(get_current_user)):
     """
     Endpoint to save a new recipe along with its ingredients in the database.
     """
@@ -419,7 +553,7 @@ def save_recipe(user_id: int, payload: RecipeCreate, current_user_id: int = Depe
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Insert the recipe into the database
-    recipe_resp = supabase.table("recipes").insert({
+    recipe_resp = await supabase.table("recipes").insert({
         "user_id": user_id,
         "title": payload.title,
         "description": payload.description or ""
@@ -440,7 +574,7 @@ def save_recipe(user_id: int, payload: RecipeCreate, current_user_id: int = Depe
     } for ing in payload.ingredients]
 
     # Insert the ingredients for the recipe into the database
-    ing_resp = supabase.table("recipe_ingredients").insert(ingredient_rows).execute()
+    ing_resp = await supabase.table("recipe_ingredients").insert(ingredient_rows).execute()
 
     # Return the response with the saved recipe and its ingredients
     return {"message": "Recipe saved", "recipe": recipe_resp.data[0], "ingredients": ing_resp.data}
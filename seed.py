@@ -2,7 +2,8 @@ from datetime import date, timedelta
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import os
-import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from main import hash_password
 
 load_dotenv()
 url = os.environ.get("SUPABASE_URL")
@@ -12,20 +13,25 @@ if not url or not key:
 
 supabase: Client = create_client(url, key)
 
-def hash_pw(pw: str) -> str:
-    return bcrypt.hashpw(pw.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
 def wipe():
-    # Order: recipe_ingredients -> recipes -> food_stock -> users
-    supabase.table("recipe_ingredients").delete().neq("id", -1).execute()
-    supabase.table("recipes").delete().neq("id", -1).execute()
-    supabase.table("food_stock").delete().neq("id", -1).execute()
-    supabase.table("users").delete().neq("id", -1).execute()
+    # Deleting users cascades to recipes, recipe_ingredients and food_stock (ON DELETE CASCADE)
+    supabase.table("users").delete(returning="minimal").neq("id", -1).execute()
 
 def seed():
-    # Users
-    u1 = supabase.table("users").insert({"username": "alice", "email": "alice@example.com", "password_hash": hash_pw("alice123")}).execute().data[0]
-    u2 = supabase.table("users").insert({"username": "bob", "email": "bob@example.com", "password_hash": hash_pw("bob123")}).execute().data[0]
+    demo_users = [
+        {"username": "alice", "email": "alice@example.com", "password": "alice123"},
+        {"username": "bob", "email": "bob@example.com", "password": "bob123"},
+    ]
+    # Hash the passwords in parallel (argon2-cffi releases the GIL while hashing)
+    with ThreadPoolExecutor(max_workers=min(len(demo_users), os.cpu_count() or 1)) as pool:
+        hashes = list(pool.map(hash_password, [u["password"] for u in demo_users]))
+
+    # Users (one batched insert; map the returned rows by username to learn the real ids)
+    users = supabase.table("users").insert([
+        {"username": u["username"], "email": u["email"], "password_hash": h} for u, h in zip(demo_users, hashes)
+    ]).execute().data
+    by_name = {u["username"]: u for u in users}
+    u1, u2 = by_name["alice"], by_name["bob"]
 
     today = date.today()
     # Stock for Alice
@@ -35,6 +41,10 @@ def seed():
         {"user_id": u1["id"], "name": "Cashew Nuts", "name_norm": "cashew nuts", "quantity": 200, "unit": "g", "expiration_date": str(today + timedelta(days=7))},  # Cashew nuts as cheese alternative
         {"user_id": u1["id"], "name": "Olive Oil", "name_norm": "olive oil", "quantity": 250, "unit": "ml", "expiration_date": str(today + timedelta(days=365))},
     ]
+    # Stock for Bob
+    foods += [
+        {"user_id": u2["id"], "name": "Oat Milk", "name_norm": "oat milk", "quantity": 1, "unit": "l", "expiration_date": str(today + timedelta(days=2))},  # Oat milk instead of regular milk
+    ]
     supabase.table("food_stock").insert(foods).execute()
 
     # Alice's recipe: Pasta Pomodoro
@@ -46,12 +56,6 @@ def seed():
         {"recipe_id": recipe["id"], "name": "Olive Oil", "name_norm": "olive oil", "quantity": 10, "unit": "ml"},
     ]).execute()
 
-    # Bob's data
-    foods_bob = [
-        {"user_id": u2["id"], "name": "Oat Milk", "name_norm": "oat milk", "quantity": 1, "unit": "l", "expiration_date": str(today + timedelta(days=2))},  # Oat milk instead of regular milk
-    ]
-    supabase.table("food_stock").insert(foods_bob).execute()
-
 if __name__ == "__main__":
     wipe()
     seed()